@@ -1,34 +1,70 @@
 import os
 import re
 import openai
-import markdown
-import pdfkit
-import whisper
+import aiofiles
+import jinja2
 import asyncio
 import shutil
 import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import json
+import orjson
+import wave
+import bisect
+import numpy as np
+from contextlib import asynccontextmanager, contextmanager, suppress
+from dataclasses import replace
 from dotenv import load_dotenv
-from moviepy.editor import VideoFileClip
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect, Form
+from markdown_it import MarkdownIt
+from pdf_render import render_pdf
+import ctranslate2
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.transcribe import Segment
+from fastapi import FastAPI, Request, UploadFile, File, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
-from typing import Dict
+from typing import Dict, List
 
 # ✅ Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# Detect if running in Docker/Linux
-if os.name == "nt":  # Windows
-    WKHTMLTOPDF_PATH = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
-else:  # Linux (Docker)
-    WKHTMLTOPDF_PATH = "/usr/bin/wkhtmltopdf"
-
 
 if not OPENAI_API_KEY:
     raise ValueError("❌ ERROR: OpenAI API key is missing! Please add it to the .env file.")
 
+# ✅ Whisper model settings (converted CTranslate2 weights are cached on disk across restarts)
+WHISPER_MODEL_SIZE = "base"
+WHISPER_CACHE_DIR = os.getenv("WHISPER_CACHE_DIR", "models")
+# FP16 on GPU (half the memory of FP32); int8 on CPU (a quarter of the memory and much faster matmuls)
+WHISPER_DEVICE = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+WHISPER_COMPUTE_TYPE = "float16" if WHISPER_DEVICE == "cuda" else "int8"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """ Loads the Whisper model and its batch scheduler, the shared OpenAI client and the PDF render pool once per worker process at startup. """
+    print(f"🟡 DEBUG: Loading Whisper model ({WHISPER_DEVICE}, {WHISPER_COMPUTE_TYPE})...")
+    app.state.whisper = await asyncio.to_thread(
+        WhisperModel,
+        WHISPER_MODEL_SIZE,
+        device=WHISPER_DEVICE,
+        compute_type=WHISPER_COMPUTE_TYPE,
+        download_root=WHISPER_CACHE_DIR,
+    )
+    print("🟢 DEBUG: Whisper model loaded successfully.")
+    app.state.whisper_scheduler = BatchScheduler(app.state.whisper)
+    app.state.whisper_scheduler.start()
+    # One client per worker keeps its HTTP connection pool warm across requests
+    app.state.openai = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    # Spawn rather than fork: the parent already runs CTranslate2 and executor threads
+    app.state.pdf_pool = ProcessPoolExecutor(max_workers=PDF_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    yield
+    await app.state.whisper_scheduler.stop()
+    await app.state.openai.close()
+    app.state.pdf_pool.shutdown(wait=False, cancel_futures=True)
+
 # ✅ Initialize FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # ✅ Enable CORS (including WebSockets!)
 app.add_middleware(
@@ -45,24 +81,189 @@ openai.api_key = OPENAI_API_KEY
 UPLOAD_DIR = "downloads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# ✅ Markdown renderer and PDF HTML shell, built once at startup
+_MD = MarkdownIt("commonmark", {"html": False})  # Raw HTML in GPT-4o output is escaped, never rendered
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_shell.html"), encoding="utf-8") as template_file:
+    _PDF_TEMPLATE = jinja2.Template(template_file.read(), autoescape=True)
+
+# ✅ Pipeline tuning
+UPLOAD_CHUNK_BYTES = 1 << 20  # Read size when streaming uploads to disk
+AUDIO_CHUNK_SECONDS = 30  # Length of each audio window handed to Whisper
+AUDIO_SAMPLE_RATE = 16000  # Whisper's native sample rate
+SUMMARY_GROUP_SEGMENTS = 60  # Whisper segments per partial GPT-4o summary (~5 minutes)
+OPENAI_MAX_CONCURRENCY = 4  # Parallel GPT-4o requests across all tasks
+BATCH_POLL_SECONDS = 30  # How often to check on Batch API summary jobs
+PDF_POOL_WORKERS = 2  # PDF render processes per Uvicorn worker
+WHISPER_BATCH_SIZE = 8  # Max audio chunks, across all tasks, per batched Whisper call
+WHISPER_BATCH_WAIT_MS = 50  # How long to wait for other transcribing tasks to queue their next chunk
+
 # ✅ Track active WebSocket connections
 active_connections: Dict[str, WebSocket] = {}
+connection_events: Dict[str, asyncio.Event] = {}  # Set once a task's WebSocket connects
+WEBSOCKET_CONNECT_TIMEOUT = 3.0  # Seconds an upload waits for its WebSocket to connect
+
+# ✅ Bound concurrent GPT-4o requests to stay under the rate limits
+openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+# Characters that are not allowed in filenames
+_SANITIZE_RE = re.compile(r'[<>:"/\\|?*]')
 
 def sanitize_filename(filename):
     """Removes invalid characters from filenames."""
-    return re.sub(r'[<>:"/\\|?*]', '', filename)[:50]  # Limit length for safety
+    return _SANITIZE_RE.sub('', filename)[:50]  # Limit length for safety
+
+def load_pcm_chunk(path: str) -> np.ndarray:
+    """Reads a 16-bit mono PCM WAV chunk into the float32 array Whisper consumes."""
+    with wave.open(path, "rb") as chunk:
+        frames = chunk.readframes(chunk.getnframes())
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+async def iterate_in_thread(iterator):
+    """Yields items from a blocking iterator, pulling each one in a worker thread."""
+    done = object()
+    while (item := await asyncio.to_thread(next, iterator, done)) is not done:
+        yield item
+
+class BatchScheduler:
+    """Runs chunk transcriptions from concurrent tasks through Whisper, batching chunks from different tasks together."""
+
+    def __init__(self, model: WhisperModel, max_batch: int = WHISPER_BATCH_SIZE, max_wait_ms: int = WHISPER_BATCH_WAIT_MS):
+        self.model = model
+        self.pipeline = BatchedInferencePipeline(model=model)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.worker = None
+        self.sessions = 0  # Tasks currently transcribing, i.e. how many chunks a batch could hold
+
+    def start(self):
+        """ Starts the scheduling worker on the running event loop. """
+        self.worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """ Stops the scheduling worker. """
+        if self.worker:
+            self.worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.worker
+
+    @contextmanager
+    def session(self):
+        """ Marks a task as transcribing for its whole run, so the worker knows to wait for its next chunk. """
+        self.sessions += 1
+        try:
+            yield
+        finally:
+            self.sessions -= 1
+
+    async def transcribe(self, audio: np.ndarray):
+        """ Queues one audio chunk and yields its segments, timed relative to the chunk, as they are decoded. """
+        if not audio.size:
+            return
+        results = asyncio.Queue()
+        abandoned = asyncio.Event()
+        await self.queue.put((audio, results, abandoned))
+        try:
+            while (segment := await results.get()) is not None:
+                if isinstance(segment, Exception):
+                    raise segment
+                yield segment
+        finally:
+            # Tells the worker to skip or stop this chunk if the task failed or was cancelled while waiting
+            abandoned.set()
+
+    async def run(self):
+        """ Batches chunks from concurrent tasks; a chunk with no other task to pair with is streamed through the regular decoder. """
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.queue.get()]
+            while len(jobs) < self.max_batch and not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+
+            # Each task has one chunk in flight, so give the other tasks a moment to queue their next one
+            deadline = loop.time() + self.max_wait
+            while len(jobs) < min(self.max_batch, self.sessions) and (timeout := deadline - loop.time()) > 0:
+                try:
+                    jobs.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            jobs = [job for job in jobs if not job[2].is_set()]
+            if len(jobs) == 1:
+                await self.stream(*jobs[0])
+            elif jobs:
+                await self.run_batch(jobs)
+
+    async def stream(self, audio: np.ndarray, results: asyncio.Queue, abandoned: asyncio.Event):
+        """ Transcribes one chunk with the full decoder, forwarding each segment as soon as it is ready. """
+        try:
+            segments, _ = await asyncio.to_thread(self.model.transcribe, audio)
+            async for segment in iterate_in_thread(segments):
+                if abandoned.is_set():
+                    return
+                results.put_nowait(segment)
+            results.put_nowait(None)
+        except Exception as e:
+            results.put_nowait(e)
+
+    async def run_batch(self, jobs: list):
+        """ Transcribes several chunks in one batched call and routes each chunk's segments back. """
+        try:
+            batches = await asyncio.to_thread(self.transcribe_batch, [audio for audio, _, _ in jobs])
+        except Exception as e:
+            for _, results, _ in jobs:
+                results.put_nowait(e)
+            return
+
+        for (_, results, _), segments in zip(jobs, batches):
+            for segment in segments:
+                results.put_nowait(segment)
+            results.put_nowait(None)
+
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[List[Segment]]:
+        """ Transcribes several chunks in one batched encode/decode pass and splits the segments per chunk. """
+        starts = []
+        position = 0
+        for audio in audios:
+            starts.append(position / AUDIO_SAMPLE_RATE)
+            position += len(audio)
+        # ffmpeg's segments run a few milliseconds past 30 s; clamp to one Whisper window so no clip is truncated with a warning
+        window = self.model.feature_extractor.chunk_length
+        clips = [{"start": start, "end": start + min(len(audio) / AUDIO_SAMPLE_RATE, window)} for start, audio in zip(starts, audios)]
+
+        # multilingual detects the language per clip, since the chunks can come from different videos
+        segments, _ = self.pipeline.transcribe(
+            np.concatenate(audios),
+            clip_timestamps=clips,
+            batch_size=len(audios),
+            multilingual=True,
+            without_timestamps=False,
+        )
+
+        results = [[] for _ in audios]
+        for segment in segments:
+            # Segment times are rounded to the millisecond, so allow for landing just before a clip start
+            index = max(bisect.bisect_right(starts, segment.start + 0.001) - 1, 0)
+            offset = starts[index]
+            results[index].append(replace(segment, start=segment.start - offset, end=segment.end - offset))
+        return results
 
 class VideoProcessor:
     """Handles video processing tasks with real-time updates via WebSockets."""
 
-    def __init__(self, video_file: UploadFile, websocket: WebSocket, task_id: str):
+    def __init__(self, video_file: UploadFile, websocket: WebSocket, task_id: str,
+                 whisper_scheduler: BatchScheduler, openai_client: openai.AsyncOpenAI, pdf_pool: ProcessPoolExecutor):
         self.video_file = video_file
         self.websocket = websocket
         self.task_id = task_id
+        self.whisper_scheduler = whisper_scheduler
         sanitized_filename = sanitize_filename(video_file.filename)
         self.video_path = os.path.join(UPLOAD_DIR, sanitized_filename)
-        self.audio_path = self.video_path.replace(".mp4", ".mp3")
+        self.chunk_dir = os.path.join(UPLOAD_DIR, f"{task_id}_chunks")
         self.pdf_path = os.path.join(UPLOAD_DIR, f"{task_id}.pdf")
+        self.openai = openai_client
+        self.pdf_pool = pdf_pool
+        self.duration = None
 
     async def send_status(self, message: str, progress: int = None):
         """ Sends real-time status updates to the WebSocket client. """
@@ -71,7 +272,8 @@ class VideoProcessor:
                 status_message = {"status": message}
                 if progress is not None:
                     status_message["progress"] = progress
-                await active_connections[self.task_id].send_json(status_message)
+                # Text frame, not bytes: the frontend JSON.parses event.data, which would be a Blob for binary frames
+                await active_connections[self.task_id].send_text(orjson.dumps(status_message).decode())
         except (WebSocketDisconnect, RuntimeError):
             print(f"❌ WebSocket disconnected for Task ID: {self.task_id}")
             active_connections.pop(self.task_id, None)
@@ -80,95 +282,265 @@ class VideoProcessor:
         """ Saves the uploaded video file. """
         await self.send_status("Uploading video...", progress=10)
         try:
-            with open(self.video_path, "wb") as buffer:
-                buffer.write(await self.video_file.read())
+            # Stream in 1 MiB chunks so large uploads never sit in memory at once
+            async with aiofiles.open(self.video_path, "wb") as buffer:
+                while chunk := await self.video_file.read(UPLOAD_CHUNK_BYTES):
+                    await buffer.write(chunk)
             await self.send_status("✅ Video uploaded successfully.", progress=20)
         except Exception as e:
             await self.send_status(f"❌ Failed to save video: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to save video: {str(e)}")
 
-    async def extract_audio(self):
-        """ Extracts audio from the uploaded video. """
+    async def probe_duration(self):
+        """ Reads the video duration with ffprobe so chunk progress can be reported. """
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1", self.video_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+        try:
+            return float(stdout.decode().strip())
+        except ValueError:
+            return None
+
+    async def extract_audio(self, chunk_queue: asyncio.Queue):
+        """ Splits the video's audio into fixed-length chunks, queueing each one as ffmpeg finishes it. """
         await self.send_status("Extracting audio from video...", progress=30)
+        os.makedirs(self.chunk_dir, exist_ok=True)
+
+        process = None
+        stderr_reader = None
         try:
-            clip = VideoFileClip(self.video_path)
-            clip.audio.write_audiofile(self.audio_path, codec="mp3")
-            clip.close()
-            await self.send_status("✅ Audio extraction complete.", progress=50)
+            self.duration = await self.probe_duration()
+
+            # ffmpeg prints each segment name to stdout once the segment is closed. Chunks are raw PCM
+            # at Whisper's sample rate, so they are loaded without a second decode or resample.
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-y", "-loglevel", "error", "-i", self.video_path,
+                "-vn", "-acodec", "pcm_s16le", "-ar", str(AUDIO_SAMPLE_RATE), "-ac", "1",
+                "-f", "segment", "-segment_time", str(AUDIO_CHUNK_SECONDS),
+                "-segment_list", "pipe:1", "-segment_list_type", "flat",
+                os.path.join(self.chunk_dir, "chunk_%04d.wav"),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            # Drain stderr alongside stdout so a chatty decode error can't fill the pipe and stall ffmpeg
+            stderr_reader = asyncio.create_task(process.stderr.read())
+
+            async for line in process.stdout:
+                chunk_name = line.decode().strip()
+                if chunk_name:
+                    await chunk_queue.put(os.path.join(self.chunk_dir, os.path.basename(chunk_name)))
+
+            stderr = await stderr_reader
+            if await process.wait() != 0:
+                raise RuntimeError(stderr.decode().strip() or f"ffmpeg exited with code {process.returncode}")
+
+            await self.send_status("✅ Audio extraction complete.")
         except Exception as e:
             await self.send_status(f"❌ Audio extraction failed: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Audio extraction failed: {str(e)}")
-
-    async def transcribe_audio(self) -> str:
-        """ Uses Whisper to transcribe audio with real-time progress updates. """
-        await self.send_status("🔄 Transcribing audio with Whisper...", progress=55)
+        finally:
+            if process and process.returncode is None:
+                process.kill()
+            if stderr_reader:
+                stderr_reader.cancel()
+            await chunk_queue.put(None)
+
+    async def transcribe_audio(self, chunk_queue: asyncio.Queue, transcript_queue: asyncio.Queue):
+        """ Uses Whisper to transcribe audio chunks as they are extracted, streaming each segment. """
+        await self.send_status("🔄 Transcribing audio with Whisper...", progress=35)
         
-        print(f"🟡 DEBUG: Starting transcription for {self.audio_path}")
+        print(f"🟡 DEBUG: Starting transcription for {self.chunk_dir}")
 
         try:
-            model = whisper.load_model("base")
-
-            print("🟢 DEBUG: Whisper model loaded successfully.")
-
-            result = model.transcribe(self.audio_path, word_timestamps=True)
+            # The session tells the scheduler this task will keep queueing chunks, so they can be batched with other tasks'
+            with self.whisper_scheduler.session():
+                chunk_index = 0
+                while (chunk_path := await chunk_queue.get()) is not None:
+                    # Segments are forwarded as soon as the scheduler yields them
+                    audio = await asyncio.to_thread(load_pcm_chunk, chunk_path)
+                    async for segment in self.whisper_scheduler.transcribe(audio):
+                        text = segment.text.strip()
+                        await transcript_queue.put(text)
+
+                        progress = None
+                        if self.duration:
+                            elapsed = chunk_index * AUDIO_CHUNK_SECONDS + segment.end
+                            progress = 35 + int(min(elapsed / self.duration, 1) * 35)
+                        await self.send_status(f"📝 Transcribing: {text[:50]}...", progress=progress)
+                    chunk_index += 1
 
             print("🟢 DEBUG: Transcription completed.")
 
-            total_segments = len(result["segments"])
-            for i, segment in enumerate(result["segments"]):
-                progress = 55 + int((i / total_segments) * 15)
-                await self.send_status(f"📝 Transcribing: {segment['text'][:50]}...", progress=progress)
-
             await self.send_status("✅ Audio transcription complete.", progress=70)
-
-            print(f"🟢 DEBUG: Transcription Result: {result['text'][:100]}...")
-
-            return result["text"]
         
         except Exception as e:
             print(f"❌ DEBUG: Transcription failed with error: {str(e)}")
             await self.send_status(f"❌ Transcription failed: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
-
-    async def summarize_text(self, text: str) -> str:
-        """ Uses GPT-4o to summarize the transcribed text. """
-        await self.send_status("📄 Generating summary...", progress=80)
+        finally:
+            await transcript_queue.put(None)
+
+    @staticmethod
+    def completion_request(prompt: str) -> dict:
+        """ Builds the chat completion body shared by the sync and Batch API paths. """
+        return {
+            "model": "gpt-4o",
+            "messages": [{"role": "system", "content": "You are an AI assistant that specializes in summarization."},
+                         {"role": "user", "content": prompt}],
+            "max_tokens": 2000,
+        }
+
+    async def complete(self, prompt: str) -> str:
+        """ Sends a single summarization prompt to GPT-4o. """
+        async with openai_semaphore:
+            response = await self.openai.chat.completions.create(**self.completion_request(prompt))
+        return response.choices[0].message.content
+
+    async def summarize_text(self, transcript_queue: asyncio.Queue) -> str:
+        """ Uses GPT-4o to summarize transcript segments while transcription is still running. """
+        partial_jobs = []
         try:
-            client = openai.OpenAI()
-            prompt = (
-                "You are a professional summarizer. Provide a structured, concise summary using Markdown "
-                "with headings (##), bullet points (-), and bold key terms (**important**). "
-                f"Here is the transcript:\n\n{text}\n\nGenerate a Markdown summary."
-            )
-
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "system", "content": "You are an AI assistant that specializes in summarization."},
-                          {"role": "user", "content": prompt}],
-                max_tokens=2000
-            )
+            group = []
+            while (text := await transcript_queue.get()) is not None:
+                group.append(text)
+                if len(group) == SUMMARY_GROUP_SEGMENTS:
+                    partial_jobs.append(asyncio.create_task(self.summarize_part(" ".join(group))))
+                    group = []
+
+            await self.send_status("📄 Generating summary...", progress=80)
+
+            # Short videos fit in a single request, so skip the map/reduce round-trip
+            if not partial_jobs:
+                summary = await self.complete(self.summary_prompt(" ".join(group)))
+            else:
+                if group:
+                    partial_jobs.append(asyncio.create_task(self.summarize_part(" ".join(group))))
+                partial_summaries = await asyncio.gather(*partial_jobs)
+                summary = await self.complete(self.summary_prompt("\n\n".join(partial_summaries), partial=True))
 
-            summary = response.choices[0].message.content
             await self.send_status("✅ Summary generated.", progress=90)
             return summary
         except Exception as e:
             await self.send_status(f"❌ Summarization failed: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+        finally:
+            # Stop partial summaries still in flight if this stage failed or was cancelled
+            for job in partial_jobs:
+                job.cancel()
+            await asyncio.gather(*partial_jobs, return_exceptions=True)
+
+    async def collect_transcript(self, transcript_queue: asyncio.Queue) -> str:
+        """ Joins transcript segments into the full transcript for the Batch API path. """
+        texts = []
+        while (text := await transcript_queue.get()) is not None:
+            texts.append(text)
+        return " ".join(texts)
+
+    async def submit_summary_batch(self, text: str) -> str:
+        """ Queues the summary request with the OpenAI Batch API and returns the batch ID. """
+        await self.send_status("📦 Submitting summary to the OpenAI Batch API...", progress=80)
+        batch_input = None
+        try:
+            batch_request = {
+                "custom_id": self.task_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self.completion_request(self.summary_prompt(text)),
+            }
+            batch_input = await self.openai.files.create(
+                file=(f"{self.task_id}.jsonl", (json.dumps(batch_request) + "\n").encode("utf-8")),
+                purpose="batch",
+            )
+            batch = await self.openai.batches.create(
+                input_file_id=batch_input.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+            )
+            await self.send_status(f"✅ Summary queued as batch {batch.id}.", progress=82)
+            return batch.id
+        except Exception as e:
+            if batch_input:
+                await self.delete_batch_files(batch_input.id)
+            await self.send_status(f"❌ Batch submission failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Batch submission failed: {str(e)}")
+
+    async def wait_for_summary_batch(self, batch_id: str):
+        """ Polls the Batch API until the summary is ready, then renders the PDF. """
+        batch = None
+        try:
+            while True:
+                batch = await self.openai.batches.retrieve(batch_id)
+                if batch.status == "completed":
+                    break
+                if batch.status in ("failed", "expired", "cancelling", "cancelled"):
+                    raise RuntimeError(f"batch {batch_id} is {batch.status}")
+
+                progress = 82
+                if batch.request_counts and batch.request_counts.total:
+                    progress += int((batch.request_counts.completed / batch.request_counts.total) * 8)
+                await self.send_status(f"⏳ Waiting for batch summary ({batch.status})...", progress=progress)
+                await asyncio.sleep(BATCH_POLL_SECONDS)
+
+            if not batch.output_file_id:
+                raise RuntimeError(f"batch {batch_id} produced no output")
+            output = await self.openai.files.content(batch.output_file_id)
+            result = json.loads(output.text.splitlines()[0])
+            summary = result["response"]["body"]["choices"][0]["message"]["content"]
+            await self.send_status("✅ Summary generated.", progress=90)
+        except Exception as e:
+            print(f"❌ DEBUG: Batch summary failed for Task ID {self.task_id}: {str(e)}")
+            await self.send_status(f"❌ Summarization failed: {str(e)}")
+            return
+        finally:
+            # The batch's files stay in the org's file storage until deleted
+            if batch:
+                await self.delete_batch_files(batch.input_file_id, batch.output_file_id, batch.error_file_id)
+
+        await self.save_summary_as_pdf(summary)
+
+    async def delete_batch_files(self, *file_ids):
+        """ Deletes Batch API input/output files from OpenAI file storage, ignoring IDs that are unset. """
+        for file_id in file_ids:
+            if not file_id:
+                continue
+            try:
+                await self.openai.files.delete(file_id)
+            except Exception as e:
+                print(f"❌ DEBUG: Failed to delete batch file {file_id}: {str(e)}")
+
+    async def summarize_part(self, text: str) -> str:
+        """ Summarizes one section of the transcript for the final reduce step. """
+        prompt = (
+            "You are a professional summarizer. Summarize this section of a longer transcript as concise "
+            "Markdown bullet points, keeping every key idea, argument, and conclusion. "
+            f"Here is the transcript section:\n\n{text}"
+        )
+        summary = await self.complete(prompt)
+        await self.send_status("📄 Summarized a section of the transcript...")
+        return summary
+
+    @staticmethod
+    def summary_prompt(text: str, partial: bool = False) -> str:
+        """ Builds the final Markdown summary prompt from the transcript or from section summaries. """
+        source = "summaries of consecutive sections of the transcript" if partial else "the transcript"
+        return (
+            "You are a professional summarizer. Provide a structured, concise summary using Markdown "
+            "with headings (##), bullet points (-), and bold key terms (**important**). "
+            f"Here is {source}:\n\n{text}\n\nGenerate a Markdown summary."
+        )
 
     async def save_summary_as_pdf(self, summary_md: str):
         """ Converts the summary to a PDF. """
         await self.send_status("📄 Generating PDF...", progress=95)
         try:
-            html_content = markdown.markdown(summary_md)
-            styled_html = f"""
-            <html><head><meta charset='UTF-8'></head>
-            <body style="font-family:Arial; padding:20px; max-width:800px;">
-            <h1 style="color:#0078D7;">Summary Report</h1>
-            {html_content}
-            </body></html>
-            """
-            config = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
-            pdfkit.from_string(styled_html, self.pdf_path, configuration=config)
+            html_content = _MD.render(summary_md)
+            styled_html = _PDF_TEMPLATE.render(title="Summary Report", body=html_content)
+            # Render in a separate process so concurrent PDFs neither hold the GIL nor block the event loop
+            await asyncio.get_running_loop().run_in_executor(self.pdf_pool, render_pdf, styled_html, self.pdf_path)
             await self.send_status("✅ PDF generation complete.", progress=100)
         except Exception as e:
             await self.send_status(f"❌ PDF generation failed: {str(e)}")
@@ -176,26 +548,62 @@ class VideoProcessor:
 
 @app.post("/process_video/")
 async def process_video(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    task_id: str = Form(...)
+    task_id: str = Form(...),
+    use_batch: bool = Form(False)
 ):
     """ API Endpoint to process video files """
 
     print(f"🟡 DEBUG: Received request with Task ID: {task_id}")
 
-    # Check if WebSocket connection exists
+    # Wait for the WebSocket connection if the upload arrived first
     if task_id not in active_connections:
-        print(f"❌ DEBUG: No active WebSocket connection for Task ID: {task_id}")
-        raise HTTPException(status_code=400, detail="No active WebSocket connection for this task.")
+        connected = connection_events.setdefault(task_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(connected.wait(), timeout=WEBSOCKET_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            connection_events.pop(task_id, None)
+            print(f"❌ DEBUG: No active WebSocket connection for Task ID: {task_id}")
+            raise HTTPException(status_code=400, detail="No active WebSocket connection for this task.")
 
-    processor = VideoProcessor(file, active_connections[task_id], task_id)
+    processor = VideoProcessor(file, active_connections[task_id], task_id,
+                               request.app.state.whisper_scheduler, request.app.state.openai, request.app.state.pdf_pool)
 
     try:
         await processor.save_uploaded_video()
-        await processor.extract_audio()
-        transcript = await processor.transcribe_audio()
-        summary_md = await processor.summarize_text(transcript)
+
+        # Extraction, transcription and summarization overlap: each stage consumes the previous one's queue
+        chunk_queue = asyncio.Queue()
+        transcript_queue = asyncio.Queue()
+        stages = [
+            asyncio.create_task(processor.extract_audio(chunk_queue)),
+            asyncio.create_task(processor.transcribe_audio(chunk_queue, transcript_queue)),
+            asyncio.create_task(
+                processor.collect_transcript(transcript_queue) if use_batch
+                else processor.summarize_text(transcript_queue)
+            ),
+        ]
+        try:
+            _, _, result = await asyncio.gather(*stages)
+        finally:
+            for stage in stages:
+                stage.cancel()
+            # Let cancelled stages finish (ffmpeg killed, no late statuses) before deleting their chunks
+            await asyncio.gather(*stages, return_exceptions=True)
+            shutil.rmtree(processor.chunk_dir, ignore_errors=True)
+
+        # Batch API summaries can take hours, so only the PDF is delivered (once the batch completes)
+        if use_batch:
+            batch_id = await processor.submit_summary_batch(result)
+            background_tasks.add_task(processor.wait_for_summary_batch, batch_id)
+
+            print(f"✅ DEBUG: Queued batch {batch_id} for Task ID: {task_id}")
+
+            return {"batch": batch_id, "pdf": f"/download/{task_id}"}
+
+        summary_md = result
         background_tasks.add_task(processor.save_summary_as_pdf, summary_md)
 
         print(f"✅ DEBUG: Successfully processed video for Task ID: {task_id}")
@@ -211,14 +619,21 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
     """ WebSocket connection for real-time status updates. """
     await websocket.accept()
     active_connections[task_id] = websocket
+    connection_events.setdefault(task_id, asyncio.Event()).set()
 
+    # Liveness is handled by Uvicorn's ping frames (--ws-ping-interval); just wait for the client to leave.
+    # receive() accepts text and binary frames alike, so stray client messages can't crash the handler.
     try:
-        while True:
-            await asyncio.sleep(2)
-            await websocket.send_json({"status": "WebSocket Connection Active"})
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
     except WebSocketDisconnect:
+        pass
+    finally:
         print(f"❌ WebSocket disconnected for Task ID: {task_id}")
-        active_connections.pop(task_id, None)
+        # A reconnect under the same task ID may already have replaced this socket
+        if active_connections.get(task_id) is websocket:
+            active_connections.pop(task_id, None)
+            connection_events.pop(task_id, None)
 
 @app.get("/download/{task_id}")
 async def download_pdf(task_id: str):
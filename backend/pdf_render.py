@@ -0,0 +1,13 @@
+from weasyprint import HTML, default_url_fetcher
+
+# Kept apart from main_api so PDF pool workers only import WeasyPrint, not the whole server
+
+def inline_only_url_fetcher(url: str, *args, **kwargs):
+    """Only resolves data: URLs, so summary content can't pull local files or remote URLs into the PDF."""
+    if not url.startswith("data:"):
+        raise ValueError(f"Refusing to fetch {url!r} while rendering the PDF")
+    return default_url_fetcher(url, *args, **kwargs)
+
+def render_pdf(styled_html: str, pdf_path: str):
+    """Renders HTML to a PDF file; runs inside the PDF process pool."""
+    HTML(string=styled_html, url_fetcher=inline_only_url_fetcher).write_pdf(pdf_path)
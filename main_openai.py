@@ -8,7 +8,6 @@ import asyncio
 import shutil
 import uuid
 from dotenv import load_dotenv
-from moviepy.editor import VideoFileClip
 from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
@@ -42,9 +41,12 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # Dictionary to track WebSocket connections
 active_connections: Dict[str, WebSocket] = {}
 
+# Characters that are not allowed in filenames
+_SANITIZE_RE = re.compile(r'[<>:"/\\|?*]')
+
 def sanitize_filename(filename):
     """Removes or replaces problematic characters from filenames."""
-    safe_filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    safe_filename = _SANITIZE_RE.sub('', filename)
     safe_filename = safe_filename.replace(' ', '_')
     return safe_filename[:50]  # Limit length to avoid path issues
 
@@ -87,9 +89,14 @@ class VideoProcessor:
         """ Extracts audio from the uploaded video. """
         await self.send_status("Extracting audio from video...", progress=30)
         try:
-            clip = VideoFileClip(self.video_path)
-            clip.audio.write_audiofile(self.audio_path, codec="mp3")
-            clip.close()
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-y", "-loglevel", "error", "-i", self.video_path,
+                "-vn", "-acodec", "libmp3lame", "-ar", "16000", "-ac", "1", self.audio_path,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode().strip() or f"ffmpeg exited with code {process.returncode}")
             await self.send_status("✅ Audio extraction complete.", progress=50)
         except Exception as e:
             await self.send_status(f"❌ Audio extraction failed: {str(e)}")